@@ -0,0 +1,147 @@
+import configparser
+import functools
+import jinja2
+import os
+import requests
+import sys
+import xml.etree.ElementTree as ET
+
+# Shared helpers for the ENA submission scripts (submit_study.py,
+# submit_umbrella.py).
+
+script_loc = os.path.dirname(os.path.abspath(__file__))
+jinja_cache_dir = os.path.expanduser("~/.cache/erga_jinja")
+os.makedirs(jinja_cache_dir, exist_ok=True)
+env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.join(script_loc, "templates/")),
+    bytecode_cache=jinja2.FileSystemBytecodeCache(directory=jinja_cache_dir),
+    auto_reload=False,
+    cache_size=400,
+)
+
+
+_session = None
+
+_SPACE_TBL = str.maketrans({" ": "_"})
+
+
+@functools.lru_cache(maxsize=None)
+def load_template(name):
+    return env.get_template(name)
+
+
+# Compile every template up front so the submit path only renders.
+for template_name in env.list_templates():
+    load_template(template_name)
+
+
+def slugify(name):
+    return name.translate(_SPACE_TBL)
+
+
+def read_credentials(filename=os.path.join(os.environ["HOME"], ".EBI/ebi.ini")):
+    config = configparser.ConfigParser()
+    config.read(filename)
+    account = config.get('Credentials', 'account')
+    password = config.get('Credentials', 'password')
+    return account, password
+
+
+def generate_submission_xml():
+    sub = ET.Element('SUBMISSION')
+    actions = ET.SubElement(sub, 'ACTIONS')
+    action = ET.SubElement(actions, 'ACTION')
+    ET.SubElement(action, 'ADD')
+
+    ET.indent(sub, space="\t")
+    ET.ElementTree(sub).write("submission.xml", encoding="utf-8", xml_declaration=True)
+
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.auth = read_credentials()
+    return _session
+
+
+def submit_study(xml_path, test=True):
+    session = get_session()
+    generate_submission_xml()
+
+    url = ""
+    if test:
+        url = "https://wwwdev.ebi.ac.uk/ena/submit/drop-box/submit/"
+    else:
+        url = "https://www.ebi.ac.uk/ena/submit/drop-box/submit"
+
+    print(f" => Submitting: {xml_path} to {url}", file=sys.stderr)
+    with open("submission.xml", "rb") as sub_file, open(xml_path, "rb") as project_file:
+        try:
+            response = session.post(
+                url,
+                files={"SUBMISSION": sub_file, "PROJECT": project_file},
+                timeout=300,
+            )
+        except requests.RequestException as e:
+            sys.exit(f"ERROR: submission to {url} failed: {e}")
+
+    receipt_bytes = response.content
+    with open(os.path.splitext(xml_path)[0] + ".receipt.xml", "wb") as fout:
+        fout.write(receipt_bytes)
+    receipt_text = receipt_bytes.decode("utf-8", errors="replace")
+    receipt = None
+    if response.ok:
+        try:
+            receipt = ET.fromstring(receipt_bytes)
+        except ET.ParseError:
+            pass
+    if receipt is None or receipt.get("success") == "false":
+        print(f"Error submitting to ENA, HTTP status: {response.status_code}", file=sys.stderr)
+        print("RECEIPT:", receipt_text, file=sys.stderr)
+        sys.exit(1)
+
+    if test:
+        print("Test submission was successfull")
+    else:
+        print("Submission was successfull")
+    print("RECEIPT: \n", receipt_text, file=sys.stderr)
+    return receipt
+
+
+def submit_many(xml_paths, combined_path="combined_projects.xml", test=True):
+    project_set = ET.Element("PROJECT_SET")
+    aliases = []
+    for xml_path in xml_paths:
+        root = ET.parse(xml_path).getroot()
+        if root.tag != "PROJECT_SET":
+            sys.exit(f"ERROR: '{xml_path}' is not a PROJECT_SET (root is <{root.tag}>)")
+        for project in root:
+            if project.tag != "PROJECT":
+                sys.exit(f"ERROR: unexpected <{project.tag}> in '{xml_path}'")
+            alias = project.get("alias")
+            if not alias:
+                sys.exit(f"ERROR: PROJECT without alias in '{xml_path}'")
+            if alias in aliases:
+                sys.exit(f"ERROR: duplicate PROJECT alias '{alias}' in '{xml_path}'")
+            aliases.append(alias)
+            project_set.append(project)
+
+    ET.indent(project_set, space="\t")
+    ET.ElementTree(project_set).write(
+        combined_path, encoding="utf-8", xml_declaration=True
+    )
+
+    receipt = submit_study(combined_path, test)
+    accessions = {
+        project.get("alias"): project.get("accession")
+        for project in receipt.iter("PROJECT")
+    }
+    missing = []
+    for alias in aliases:
+        if accessions.get(alias):
+            print(f"{alias}\t{accessions[alias]}")
+        else:
+            missing.append(alias)
+    if missing:
+        sys.exit(f"ERROR: no accession in the receipt for: {', '.join(missing)}")
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+import argparse
+
+from _common import submit_many
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Register several PROJECT_SET xml files in a single ENA submission"
+    )
+    parser.add_argument(
+        "xml_files",
+        nargs="+",
+        help="PROJECT_SET xml files to submit (e.g. written by submit_study.py)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="combined_projects.xml",
+        help="Path of the merged PROJECT_SET xml (Default: combined_projects.xml)",
+    )
+    parser.add_argument(
+        "--commit",
+        dest="commit", action="store_true", required=False,
+        help="Do an actual submission if the test is successfull")
+    args = parser.parse_args()
+
+    submit_many(args.xml_files, args.output, not args.commit)
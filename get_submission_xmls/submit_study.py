@@ -1,38 +1,76 @@
 #!/usr/bin/env python
 import argparse
-import configparser
-import jinja2
 import os
-import subprocess
 import sys
 import xml.etree.ElementTree as ET
 
 from collections import OrderedDict
 from datetime import datetime
-from xml.dom import minidom
 
+from _common import load_template, slugify, submit_study
 
 # Author: Jessica Gomez-Garrido, CNAG.
 # Contact email: jessica.gomez@cnag.eu
 # Date:20230602
 
-script_loc = os.path.dirname(os.path.abspath(sys.argv[0]))
-env = jinja2.Environment(
-    loader=jinja2.FileSystemLoader(os.path.join(script_loc, "templates/"))
-)
-
-
-def get_attributes(root, parent, child, attr, **element):
-    child = root.createElement(attr)
-    if element:
-        for key in element:
-            if element[key] != "":
-                child.setAttribute(key, element[key])
-            else:
-                text = root.createTextNode(key)
-                child.appendChild(text)
-    parent.appendChild(child)
-    return child
+# (project, study type) -> (alias format, title template, description template)
+PROJECT_CONFIG = {
+    ("ERGA-pilot", "assembly"): (
+        "{cname_slug}_genome_assembly",
+        "assembly_title.txt",
+        "pilot_assembly_description.txt",
+    ),
+    ("ERGA-BGE", "assembly"): (
+        "erga-bge-{tolid}_primary-{today}",
+        "bge_assembly_title.txt",
+        "bge_assembly_description.txt",
+    ),
+    ("ATLASea", "assembly"): (
+        "{cname_slug}_genome_assembly",
+        "assembly_title.txt",
+        "atlasea_assembly_description.txt",
+    ),
+    ("CBP", "assembly"): (
+        "{cname_slug}_genome_assembly",
+        "assembly_title.txt",
+        "cbp_assembly_description.txt",
+    ),
+    ("other", "assembly"): (
+        "{cname_slug}_genome_assembly",
+        "assembly_title.txt",
+        "other_assembly_description.txt",
+    ),
+    ("ERGA-pilot", "sequencing"): (
+        "{cname_slug}_sequencing_data",
+        "sequencing_title.txt",
+        "pilot_data_description.txt",
+    ),
+    ("ERGA-BGE", "sequencing"): (
+        "erga-bge-{tolid}-study-rawdata-{today}",
+        "bge_data_title.txt",
+        "bge_data_description.txt",
+    ),
+    ("ATLASea", "sequencing"): (
+        "{cname_slug}_sequencing_data",
+        "sequencing_title.txt",
+        "atlasea_data_description.txt",
+    ),
+    ("CBP", "sequencing"): (
+        "{cname_slug}_sequencing_data",
+        "sequencing_title.txt",
+        "other_data_description.txt",
+    ),
+    ("EASI", "sequencing"): (
+        "{cname_slug}_sequencing_data",
+        "sequencing_title.txt",
+        "other_data_description.txt",
+    ),
+    ("other", "sequencing"): (
+        "{cname_slug}_sequencing_data",
+        "sequencing_title.txt",
+        "other_data_description.txt",
+    ),
+}
 
 
 def get_studies(
@@ -44,71 +82,26 @@ def get_studies(
     sample_coordinator,
     study_type,
     locus_tag,
+    today,
 ):
-    study_title = ""
-    if study_type == "assembly":
-        study_title = "Genome assembly of " + species
-    elif study_type == "sequencing":
-        study_title = "Sequencing data of " + species
+    cname_slug = slugify(cname) if cname else ""
+    alias_format, title_template, description_template = PROJECT_CONFIG[
+        (project, study_type)
+    ]
+    context = {
+        "species": species,
+        "cname": cname,
+        "tolid": tolid,
+        "sample_coordinator": sample_coordinator,
+        "data": study_type,
+    }
 
-    description = ""
     study_name = tolid
-    if study_type == "assembly":
-        alias = cname.replace(" ", "_") + "_genome_assembly"
-        study_title = env.get_template("assembly_title.txt").render(
-            species=species, cname=cname, tolid=tolid
-        )
-        if project == "ERGA-pilot":
-            description_template = "pilot_assembly_description.txt"
-        elif project == "ERGA-BGE":
-            alias = (
-                "erga-bge-" + tolid + "_primary-" + datetime.now().strftime("%Y-%m-%d")
-            )
-            study_title = env.get_template("bge_assembly_title.txt").render(
-                species=species, tolid=tolid
-            )
-            description_template = "bge_assembly_description.txt"
-        elif project == "ATLASea":
-            description_template = "atlasea_assembly_description.txt"
-        description = env.get_template(description_template).render(
-            species=species,
-            cname=cname,
-            sample_coordinator=sample_coordinator,
-        )
-    elif study_type == "sequencing":
-        alias = cname.replace(" ", "_") + "_sequencing_data"
+    alias = alias_format.format(cname_slug=cname_slug, tolid=tolid, today=today)
+    if study_type == "sequencing":
         study_register[tolid] = alias
-        description = (
-            "This project collects the sequencing data generated for "
-            + species
-            + " (common name "
-            + cname
-            + ")"
-        )
-        if project == "ERGA-pilot":
-            description_template = "pilot_data_description.txt"
-        elif project == "ERGA-BGE":
-            alias = (
-                "erga-bge-"
-                + tolid
-                + "-study-rawdata-"
-                + datetime.now().strftime("%Y-%m-%d")
-            )
-            study_title = env.get_template("bge_data_title.txt").render(
-                species=species, data=study_type
-            )
-            description_template = "bge_data_description.txt"
-        elif project == "ATLASea":
-            description_template = "atlasea_data_description.txt"
-        else:
-            description_template = "other_data_description.txt"
-        study_register[tolid] = alias
-        description = env.get_template(description_template).render(
-            species=species,
-            cname=cname,
-            sample_coordinator=sample_coordinator,
-            data=study_type,
-        )
+    study_title = load_template(title_template).render(**context)
+    description = load_template(description_template).render(**context)
 
     get_study_xml(
         project,
@@ -126,11 +119,9 @@ def get_study_xml(
     project, center, alias, study_name, study_title, description, study_type, locus_tag
 ):
 
-    projects = ""
-    elements = {}
-    elements["center_name"] = center
-    elements["alias"] = alias
-    projects = get_attributes(root["study"], study_xml, projects, "PROJECT", **elements)
+    projects = ET.SubElement(study_xml, "PROJECT")
+    projects.set("center_name", center)
+    projects.set("alias", alias)
 
     attr = OrderedDict()
     attr["NAME"] = study_name
@@ -138,92 +129,21 @@ def get_study_xml(
     attr["DESCRIPTION"] = description
 
     for key in attr:
-        attributes = root["study"].createElement(key)
-        text = root["study"].createTextNode(attr[key])
-        attributes.appendChild(text)
-        projects.appendChild(attributes)
+        attributes = ET.SubElement(projects, key)
+        attributes.text = attr[key]
 
-    attributes = ""
-    attributes = get_attributes(
-        root["study"], projects, attributes, "SUBMISSION_PROJECT"
-    )
+    attributes = ET.SubElement(projects, "SUBMISSION_PROJECT")
 
-    seqp = root["study"].createElement("SEQUENCING_PROJECT")
+    seqp = ET.SubElement(attributes, "SEQUENCING_PROJECT")
     if study_type == "assembly" and locus_tag != "-":
-        loc = ""
-        loc = get_attributes(
-            root["study"], seqp, loc, "LOCUS_TAG_PREFIX", **{locus_tag: ""}
-        )
-    attributes.appendChild(seqp)
+        loc = ET.SubElement(seqp, "LOCUS_TAG_PREFIX")
+        loc.text = locus_tag
 
     if project == "CBP" or project == "EASI" or project == "ERGA-BGE":
-        keyword = {}
-        keyword["TAG"] = "Keyword"
-        keyword["VALUE"] = project
-        attributes = ""
-        study_attr = ""
-        attributes = get_attributes(
-            root["study"], projects, attributes, "PROJECT_ATTRIBUTES"
-        )
-        study_attr = get_attributes(
-            root["study"], attributes, study_attr, "PROJECT_ATTRIBUTE", **keyword
-        )
-
-
-def read_credentials(filename=os.path.join(os.environ["HOME"], ".EBI/ebi.ini")):
-    config = configparser.ConfigParser()
-    config.read(filename)
-    account = config.get('Credentials', 'account')
-    password = config.get('Credentials', 'password')
-    return account, password
-
-
-def generate_submission_xml():
-    sub = ET.Element('SUBMISSION')
-    actions = ET.SubElement(sub, 'ACTIONS')
-    action = ET.SubElement(actions, 'ACTION')
-    ET.SubElement(action, 'ADD')
-
-    xml_string = minidom.parseString(ET.tostring(sub)).toprettyxml(indent="\t", encoding="utf-8")
-    with open("submission.xml", 'wb') as xml_file:
-        xml_file.write(xml_string)
-
-
-def submit_study(xml_path, test=True):
-    account, password = read_credentials()
-    generate_submission_xml()
-
-    url = ""
-    if test:
-        url = '"https://wwwdev.ebi.ac.uk/ena/submit/drop-box/submit/"'
-    else:
-        url = '"https://www.ebi.ac.uk/ena/submit/drop-box/submit"'
-
-    curl_command = f"curl -u {account}:{password} " \
-        f"""-F "SUBMISSION=@submission.xml" -F "PROJECT=@{xml_path}" """\
-        f'{url}'
-    print(f" => Submitting: {curl_command}", file=sys.stderr)
-
-    p = subprocess.Popen(
-        curl_command, shell=True,
-        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-    )
-    out, err = p.communicate()
-
-    receipt = ET.fromstring(out.decode("utf-8"))
-    success = receipt.get("success")
-    if success == "false":
-        print(f"Error running curl command, return code: {p.returncode}", file=sys.stderr)
-        print("STDOUT:", out.decode("utf-8"), file=sys.stderr)
-        print("STDERR:", err.decode("utf-8"), file=sys.stderr)
-        sys.exit(1)
-
-    if test:
-        print("Test submission was successfull")
-    else:
-        print("Submission was successfull")
-    print("STDOUT: \n", out.decode("utf-8"), file=sys.stderr)
-    print("STDERR: \n", err.decode("utf-8"), file=sys.stderr)
+        attributes = ET.SubElement(projects, "PROJECT_ATTRIBUTES")
+        study_attr = ET.SubElement(attributes, "PROJECT_ATTRIBUTE")
+        study_attr.set("TAG", "Keyword")
+        study_attr.set("VALUE", project)
 
 
 if __name__ == "__main__":
@@ -261,19 +181,21 @@ if __name__ == "__main__":
     )
     parser.add_argument("--commit", dest="commit", action="store_true", required=False, help="Do an actual submission if the test is successfull")
     args = parser.parse_args()
+    if (args.project, args.study_type) not in PROJECT_CONFIG:
+        parser.error(
+            f"{args.study_type} studies are not configured for project '{args.project}'"
+        )
+    alias_format = PROJECT_CONFIG[(args.project, args.study_type)][0]
+    if "{cname_slug}" in alias_format and not args.name:
+        parser.error(
+            f"-n/--name is required for {args.project} {args.study_type} studies"
+        )
 
     cred_path = os.path.join(os.environ["HOME"], ".EBI/ebi.ini")
     if not os.path.exists(cred_path):
-        print(f"ERROR: credentials not found at path '{cred_path}'")
-
-    cred_path = os.path.join(os.environ["HOME"], ".EBI/ebi.ini")
-    if not os.path.exists(cred_path):
-        print(f"ERROR: credentials not found at path '{cred_path}'")
+        sys.exit(f"ERROR: credentials not found at path '{cred_path}'")
 
-    root = {}
-    root["study"] = minidom.Document()
-    study_xml = root["study"].createElement("PROJECT_SET")
-    root["study"].appendChild(study_xml)
+    study_xml = ET.Element("PROJECT_SET")
     study_register = {}
 
     center = args.center
@@ -283,6 +205,7 @@ if __name__ == "__main__":
     sample_coordinator = args.sample_ambassador
     locus_tag = args.locus_tag
     study_type = args.study_type
+    today = datetime.now().strftime("%Y-%m-%d")
 
     get_studies(
         args.project,
@@ -293,14 +216,13 @@ if __name__ == "__main__":
         sample_coordinator,
         study_type,
         locus_tag,
+        today,
     )
 
-    save_path = ""
-    for i in root:
-        xml_str = root[i].toprettyxml(indent="\t")
-        save_path_file = species.replace(" ", "_") + "." + i + "." + study_type + ".xml"
-        save_path = save_path_file
-        with open(save_path_file, "w") as f:
-            f.write(xml_str)
+    species_slug = slugify(species)
+    save_path = f"{species_slug}.study.{study_type}.xml"
+    tree = ET.ElementTree(study_xml)
+    ET.indent(tree, space="\t")
+    tree.write(save_path, encoding="utf-8", xml_declaration=True)
 
     submit_study(save_path, not args.commit)